@@ -7,63 +7,192 @@ Usage:
 """
 
 import argparse
-import csv
-import io
 import os
+import re
 import sys
-from email import policy
-from email.parser import BytesParser
+from concurrent.futures import ProcessPoolExecutor
+from email.header import decode_header
+from email.parser import BytesHeaderParser
 from email.utils import parsedate_to_datetime
+from functools import lru_cache
 
+# 원시 헤더 바이트에서 검사할 시그니처 (모듈 수준 상수)
+_PHPMAILER_SIG = b"PHPMailer"
 
-def process_file(filepath):
-    with open(filepath, "rb") as f:
-        msg = BytesParser(policy=policy.default).parse(f)
-    subject = msg["subject"] or ""
-    from_ = msg["from"] or ""
-    to = msg["to"] or ""
-    # 날짜 파싱 및 포맷: yyyy-mm-dd hh:mm:ss +0900
-    date_hdr = msg["date"] or ""
+# 접힌(folded) 헤더의 줄바꿈. 이어지는 공백은 남기고 개행만 지운다
+_FOLD_RE = re.compile(r"\r?\n(?=[ \t])")
+
+
+def _unfold(value):
+    """compat32는 접힌 헤더를 펴주지 않으므로 직접 unfold한다."""
+    return _FOLD_RE.sub("", value)
+
+
+# 출력 버퍼를 모았다가 내보내는 기준 크기
+_WRITE_BUFFER_SIZE = 65536
+
+
+def _csv_field(value):
+    """필요할 때만 RFC 4180 방식으로 따옴표 처리한 필드를 반환한다."""
+    if any(c in value for c in ',"\n\r'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _csv_row(row):
+    return ",".join(_csv_field(str(field)) for field in row).encode("utf-8") + b"\n"
+
+
+def _decode_hdr(value):
+    """표시용 헤더 값을 디코딩한다. encoded-word가 없으면 그대로 반환.
+
+    compat32 파서는 원시 8비트 헤더를 unknown-8bit Header 객체로 주므로
+    그 경우 decode_header로 원본 바이트를 꺼내 UTF-8로 복원한다.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        value = _unfold(value)
+        if "=?" not in value:
+            return value
+    try:
+        parts = []
+        for chunk, charset in decode_header(value):
+            if isinstance(chunk, bytes):
+                if charset is None or charset == "unknown-8bit":
+                    charset = "utf-8"
+                try:
+                    parts.append(chunk.decode(charset, errors="replace"))
+                except LookupError:
+                    parts.append(chunk.decode("utf-8", errors="replace"))
+            else:
+                parts.append(chunk)
+        return _unfold("".join(parts))
+    except Exception:
+        return _unfold(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _format_date(date_hdr):
+    """Date 헤더 문자열을 'yyyy-mm-dd hh:mm:ss +0900' 형식으로 변환한다.
+
+    대량 발송 메일은 동일한 Date 값이 반복되므로 헤더 문자열 기준으로
+    파싱·포맷 결과를 캐시한다(프로세스별 캐시).
+    """
     try:
         dt = parsedate_to_datetime(date_hdr)
         # datetime이 timezone-aware인지 확인, 없으면 그대로 출력
-        date = dt.strftime("%Y-%m-%d %H:%M:%S %z")
+        return dt.strftime("%Y-%m-%d %H:%M:%S %z")
     except Exception:
-        date = date_hdr
-    x_ip = msg.get("X-Originating-IP", "").strip("[]")
-    # PHPMailer 문자열 포함 여부 확인
-    phpmailer_flag = "Yes" if any("PHPMailer" in str(v) for v in msg.values()) else "No"
+        return date_hdr
+
+
+# 헤더 블록을 찾기 위해 한 번에 읽는 크기
+_HEADER_CHUNK = 65536
+
+
+def _find_header_end(data, start=0):
+    """빈 줄(CRLF 또는 LF) 중 먼저 나오는 쪽의 위치를 반환한다. 없으면 -1."""
+    i = data.find(b"\r\n\r\n", start)
+    j = data.find(b"\n\n", start)
+    if i < 0:
+        return j
+    if j < 0:
+        return i
+    return min(i, j)
+
+
+def _read_header_block(f):
+    """헤더 블록(첫 빈 줄 이전)만 바이트로 읽는다. 본문은 읽지 않는다.
+
+    줄 단위 반복 대신 64 KiB 단위로 읽고 bytes.find로 빈 줄을 찾는다.
+    64 KiB를 넘는 헤더(드묾)는 청크를 이어 붙이며 경계 걸침을
+    고려해 꼬리부터 재검색한다.
+    """
+    data = f.read(_HEADER_CHUNK)
+    end = _find_header_end(data)
+    while end < 0:
+        chunk = f.read(_HEADER_CHUNK)
+        if not chunk:
+            break
+        search_from = max(0, len(data) - 3)
+        data += chunk
+        end = _find_header_end(data, search_from)
+    return data if end < 0 else data[:end]
+
+
+def process_file(filepath):
+    # 본문(첨부파일 포함)은 디코딩하지 않고 헤더만 파싱한다
+    try:
+        with open(filepath, "rb") as f:
+            header_bytes = _read_header_block(f)
+    except OSError as e:
+        # 표준 입력 경로 목록에 잘못된 경로가 섞여도 전체 배치를 죽이지 않는다
+        print(f"읽기 실패: {filepath}: {e}", file=sys.stderr)
+        return None
+    # 기본 compat32 파서 사용: policy.default의 구조화 헤더 클래스를 만들지
+    # 않고, 표시할 헤더만 필요할 때 RFC 2047 디코딩한다
+    msg = BytesHeaderParser().parsebytes(header_bytes)
+    subject = _decode_hdr(msg["subject"])
+    from_ = _decode_hdr(msg["from"])
+    to = _decode_hdr(msg["to"])
+    # 날짜 파싱 및 포맷: yyyy-mm-dd hh:mm:ss +0900
+    date = _format_date(_unfold(str(msg["date"] or "")))
+    x_ip = _unfold(str(msg.get("X-Originating-IP") or "")).strip().strip("[]")
+    # PHPMailer 문자열 포함 여부 확인 (헤더 객체를 거치지 않고 원시 바이트로 검사)
+    phpmailer_flag = "Yes" if _PHPMAILER_SIG in header_bytes else "No"
     return [filepath, subject, from_, to, date, x_ip, phpmailer_flag]
 
 
+def iter_eml(root, recursive):
+    """os.scandir 기반 제너레이터로 .eml 파일 경로를 순차적으로 생성한다.
+
+    전체 목록을 먼저 만들지 않으므로 대용량 아카이브에서도
+    탐색과 처리가 겹쳐서 진행된다. DirEntry가 stat 결과를
+    캐시하므로 항목당 추가 stat() 호출도 없다.
+    """
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        yield from iter_eml(entry.path, recursive)
+                elif entry.name.lower().endswith(".eml") and entry.is_file():
+                    yield entry.path
+    except OSError as e:
+        # 권한 없음·탐색 중 삭제된 디렉토리는 건너뛴다 (os.walk의 기본 동작과 동일)
+        print(f"디렉토리 탐색 실패: {root}: {e}", file=sys.stderr)
+
+
+def _iter_stdin_paths():
+    """표준 입력에서 줄 단위 경로를 읽는다 (예: find ... | eml-list -i -)."""
+    for line in sys.stdin:
+        path = line.rstrip("\n")
+        if path:
+            yield path
+
+
 def gather_paths(input_path, recursive):
-    paths = []
+    if input_path == "-":
+        # 쉘 루프에서 파일마다 새로 띄우는 대신 한 프로세스로 일괄 처리:
+        # 인터프리터 기동·모듈 임포트 비용이 호출 전체에 한 번만 든다
+        return _iter_stdin_paths()
     if os.path.isdir(input_path):
-        if recursive:
-            for root, _, files in os.walk(input_path):
-                for name in files:
-                    if name.lower().endswith(".eml"):
-                        paths.append(os.path.join(root, name))
-        else:
-            for name in os.listdir(input_path):
-                if name.lower().endswith(".eml"):
-                    paths.append(os.path.join(input_path, name))
-    elif os.path.isfile(input_path) and input_path.lower().endswith(".eml"):
-        paths.append(input_path)
-    else:
-        sys.exit("유효한 EML 파일 또는 디렉토리가 아닙니다.")
-    return paths
+        return iter_eml(input_path, recursive)
+    if os.path.isfile(input_path) and input_path.lower().endswith(".eml"):
+        return iter([input_path])
+    sys.exit("유효한 EML 파일 또는 디렉토리가 아닙니다.")
 
 
 def main():
-    # Windows 콘솔 출력에서 utf-8 인코딩 보장
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="\n")
-
     parser = argparse.ArgumentParser(
         description="EML 분석 도구 (CSV 출력 + X-Originating-IP + PHPMailer 검사 + 날짜 포맷)"
     )
     parser.add_argument(
-        "-i", "--input", required=True, help="EML 파일 또는 디렉토리 경로"
+        "-i",
+        "--input",
+        required=True,
+        help="EML 파일 또는 디렉토리 경로 ('-'이면 표준 입력에서 경로 목록을 읽음)",
     )
     parser.add_argument(
         "-r", "--recursive", action="store_true", help="디렉토리 재귀 탐색"
@@ -72,13 +201,26 @@ def main():
 
     paths = gather_paths(args.input, args.recursive)
 
-    writer = csv.writer(sys.stdout, lineterminator="\n")
-    writer.writerow(
+    # UTF-8 바이트를 stdout.buffer에 직접 기록한다. 콘솔 인코딩과 무관하게
+    # utf-8이 보장되고, csv 모듈의 행·필드 단위 디스패치도 생략된다.
+    out = sys.stdout.buffer
+    buf = bytearray()
+    buf += _csv_row(
         ["File", "Subject", "From", "To", "Date", "X-Originating-IP", "PHPMailer"]
     )
-    for p in paths:
-        row = process_file(p)
-        writer.writerow(row)
+    # 파일 단위 헤더 파싱은 CPU 바운드이므로 프로세스 풀로 병렬 처리한다.
+    # CSV 기록은 부모 프로세스에서 수행하여 출력 순서를 보장한다.
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for row in executor.map(process_file, paths, chunksize=64):
+            if row is None:
+                continue
+            buf += _csv_row(row)
+            if len(buf) >= _WRITE_BUFFER_SIZE:
+                out.write(buf)
+                buf.clear()
+    if buf:
+        out.write(buf)
+    out.flush()
 
 
 if __name__ == "__main__":
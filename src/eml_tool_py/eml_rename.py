@@ -15,18 +15,20 @@ import hashlib
 import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from email.header import decode_header, make_header
+from functools import partial
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
 # ──────────────────────── 도움말 텍스트 ──────────────────────── #
 _DESCRIPTION = """\
 DESCRIPTION
     .eml 파일의 수신(기본) 또는 발신 날짜를 읽어
     'yyyy-mm-dd HHMMSS 제목_<해시>.eml' 형식으로 파일명을 변경합니다.
-    해시는 SHA‑256 값의 앞 8자이며, 동일 날짜·제목이라도 파일이 다르면
-    충돌 없이 고유한 이름이 보장됩니다.
+    해시는 파일 앞 64 KiB의 SHA‑256 값 앞 8자이며, 동일 날짜·제목의
+    서로 다른 파일도 사실상 충돌 없이 구분됩니다.
 """
 
 _EXAMPLES = """\
@@ -107,11 +109,12 @@ def _build_parser() -> argparse.ArgumentParser:
 
 # ──────────────────────── 유틸리티 ──────────────────────── #
 _SUBJECT_RE = re.compile(r'[\\/:*?"<>|\r\n]+')
+_WS_RE = re.compile(r"\s{2,}")
 
 
 def _safe_subject(subject: str, max_len: int = 120) -> str:
     cleaned = _SUBJECT_RE.sub(" ", subject).strip()
-    cleaned = re.sub(r"\s{2,}", " ", cleaned)
+    cleaned = _WS_RE.sub(" ", cleaned)
     return (
         cleaned[:max_len].rstrip() if len(cleaned) > max_len else cleaned
     ) or "untitled"
@@ -119,13 +122,28 @@ def _safe_subject(subject: str, max_len: int = 120) -> str:
 
 def _get_subject(msg: email.message.Message) -> str:
     raw = msg.get("Subject", "")
+    # 8비트 원시 헤더는 str이 아닌 Header 객체로 올 수 있다
+    if isinstance(raw, str) and "=?" not in raw:
+        # encoded-word 마커가 없으면 RFC 2047 디코딩이 필요 없다
+        return raw
     try:
         return str(make_header(decode_header(raw)))
     except Exception:
-        return raw
+        return str(raw)
 
 
 def _extract_datetime(msg: email.message.Message, mode: str) -> datetime | None:
+    if mode == "received":
+        # 맨 위 Received 헤더가 최종 수신 시각. 타임스탬프는 마지막 ';' 뒤에
+        # 오므로 정규식 대신 C 구현인 str.rsplit으로 잘라낸다.
+        received = msg.get_all("Received") or []
+        if received:
+            tail = received[0].rsplit(";", 1)
+            if len(tail) == 2:
+                try:
+                    return email.utils.parsedate_to_datetime(tail[1].strip())
+                except Exception:
+                    pass
     hdr_val = msg.get("Date")
     if hdr_val is None:
         return None
@@ -135,12 +153,71 @@ def _extract_datetime(msg: email.message.Message, mode: str) -> datetime | None:
         return None
 
 
+# 해시 대상 바이트 수. 헤더 + 본문 앞부분이면 동일 초·동일 제목
+# 중복을 구분하기에 충분하고, 수 MB짜리 첨부파일을 읽지 않아도 된다.
+_HASH_PREFIX_SIZE = 65536
+
+
 def _short_hash(path: Path, length: int = 8) -> str:
-    h = hashlib.sha256()
+    """파일 앞 64 KiB의 SHA-256 앞 `length`자를 반환한다.
+
+    8자리(32비트) 축약 자체가 충돌 한계이므로, 앞 64 KiB 이후에서만
+    다른 파일을 구분하지 못하는 것은 실질적인 손실이 아니다.
+    """
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()[:length]
+        data = f.read(_HASH_PREFIX_SIZE)
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+# 워커 프로세스별 디렉터리 fd 캐시. 같은 폴더의 파일을 연달아 처리할 때
+# 이름 변경마다 디렉터리 경로를 다시 해석하지 않도록 한 번만 연다.
+_DIR_FD_CACHE: dict[str, int] = {}
+_DIR_FD_CACHE_MAX = 128
+
+
+def _dir_fd_for(directory: str) -> int | None:
+    if os.rename not in os.supports_dir_fd:
+        return None
+    fd = _DIR_FD_CACHE.get(directory)
+    if fd is None:
+        if len(_DIR_FD_CACHE) >= _DIR_FD_CACHE_MAX:
+            for cached in _DIR_FD_CACHE.values():
+                os.close(cached)
+            _DIR_FD_CACHE.clear()
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return None
+        _DIR_FD_CACHE[directory] = fd
+    return fd
+
+
+def _replace(file_path: Path, target: Path) -> None:
+    dir_fd = _dir_fd_for(str(file_path.parent))
+    if dir_fd is not None:
+        os.replace(file_path.name, target.name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    else:
+        os.replace(file_path, target)
+
+
+def _rename_noreplace(file_path: Path, target: Path) -> None:
+    """대상이 이미 있으면 FileExistsError를 내는 원자적 이름 변경.
+
+    link는 대상이 존재하면 커널이 EEXIST로 거부하므로, 병렬 워커 둘이
+    같은 이름을 계산해도 한쪽만 성공한다. exists() 검사 후 replace하는
+    방식과 달리 검사와 변경 사이의 경쟁 창이 없다.
+    """
+    dir_fd = _dir_fd_for(str(file_path.parent))
+    if (
+        dir_fd is not None
+        and os.link in os.supports_dir_fd
+        and os.unlink in os.supports_dir_fd
+    ):
+        os.link(file_path.name, target.name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+        os.unlink(file_path.name, dir_fd=dir_fd)
+    else:
+        os.link(file_path, target)
+        os.unlink(file_path)
 
 
 def _unique_path(base: Path) -> Path:
@@ -177,36 +254,75 @@ def _rename_file(
 
     target = file_path.with_name(base_name + ".eml")
 
-    # 중복 처리
-    if target.exists():
-        if on_dup == "skip":
-            print(f"[SKIP] 이미 존재: {target.name}")
-            return
-        if on_dup == "overwrite":
-            pass
-        else:  # suffix
-            target = _unique_path(target)
-
-    if verbose or dry_run:
-        action = "→" if not dry_run else "(DRY‑RUN) →"
-        print(f"{file_path.name} {action} {target.name}")
+    if dry_run:
+        # 실제 변경 없이 예상 결과만 출력
+        if target.exists():
+            if on_dup == "skip":
+                print(f"[SKIP] 이미 존재: {target.name}")
+                return
+            if on_dup != "overwrite":
+                target = _unique_path(target)
+        print(f"{file_path.name} (DRY‑RUN) → {target.name}")
+        return
 
-    if not dry_run:
+    if on_dup == "overwrite":
         try:
-            os.replace(file_path, target)
+            _replace(file_path, target)
         except Exception as e:
             print(f"[ERR] 이름 변경 실패: {file_path!s}: {e}", file=sys.stderr)
-
-
-def _iter_target_files(paths: Iterable[str], recursive: bool) -> list[Path]:
-    files: list[Path] = []
+            return
+    else:
+        # skip/suffix: exists() 검사 후 교체 대신 원자적 no-replace 변경.
+        # 병렬 워커가 같은 이름을 계산해도 한쪽은 EEXIST를 받아
+        # skip 또는 suffix 재시도로 빠지므로 조용히 덮어쓰지 않는다.
+        while True:
+            try:
+                _rename_noreplace(file_path, target)
+                break
+            except FileExistsError:
+                if on_dup == "skip":
+                    print(f"[SKIP] 이미 존재: {target.name}")
+                    return
+                target = _unique_path(target)
+            except OSError:
+                # 하드링크를 지원하지 않는 파일시스템: 기존 방식으로 대체
+                if target.exists():
+                    if on_dup == "skip":
+                        print(f"[SKIP] 이미 존재: {target.name}")
+                        return
+                    target = _unique_path(target)
+                try:
+                    _replace(file_path, target)
+                except Exception as e:
+                    print(f"[ERR] 이름 변경 실패: {file_path!s}: {e}", file=sys.stderr)
+                    return
+                break
+
+    if verbose:
+        print(f"{file_path.name} → {target.name}")
+
+
+def _scan_eml(root: str, recursive: bool) -> Iterator[Path]:
+    """os.scandir 기반 제너레이터. 전체 목록을 만들지 않고 스트리밍 탐색한다."""
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        yield from _scan_eml(entry.path, recursive)
+                elif entry.name.lower().endswith(".eml") and entry.is_file():
+                    yield Path(entry.path)
+    except OSError as e:
+        # 권한 없음 등으로 읽을 수 없는 디렉터리는 건너뛴다
+        print(f"[ERR] 탐색 실패: {root}: {e}", file=sys.stderr)
+
+
+def _iter_target_files(paths: Iterable[str], recursive: bool) -> Iterator[Path]:
     for p in map(Path, paths):
         if p.is_file() and p.suffix.lower() == ".eml":
-            files.append(p)
+            yield p
         elif p.is_dir():
-            pattern = "**/*.eml" if recursive else "*.eml"
-            files.extend(p.glob(pattern))
-    return files
+            yield from _scan_eml(str(p), recursive)
 
 
 # ──────────────────────── 메인 ──────────────────────── #
@@ -215,13 +331,26 @@ def main(argv: list[str] | None = None) -> None:
     args = parser.parse_args(argv)
 
     files = _iter_target_files(args.paths, args.recursive)
-    if not files:
+
+    # 파일별 파싱·해시는 독립 작업이므로 프로세스 풀에서 병렬 처리한다.
+    # files는 제너레이터이므로 탐색과 처리가 겹쳐서 진행된다.
+    worker = partial(
+        _rename_file,
+        mode=args.mode,
+        uniq=args.uniq,
+        on_dup=args.on_dup,
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+    )
+    processed = 0
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for _ in executor.map(worker, files, chunksize=64):
+            processed += 1
+
+    if not processed:
         print("처리할 .eml 파일이 없습니다.", file=sys.stderr)
         sys.exit(1)
 
-    for f in files:
-        _rename_file(f, args.mode, args.uniq, args.on_dup, args.dry_run, args.verbose)
-
 
 if __name__ == "__main__":
     main()
@@ -1,70 +1,280 @@
 #!/home/ghostyak/.local/bin/python
 import argparse
+import base64
 import os
+import quopri
 import re
 import shutil
-from email import policy
-from email.parser import BytesParser
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
+# MIME 파트 헤더에서 필요한 값만 뽑는 패턴. 헤더 이름은 줄 시작에 앵커해
+# 다른 헤더 값 안의 동일 문자열과 혼동하지 않는다. boundary/charset은
+# 접힌(folded) 파라미터를 지원하도록 블록 전체에서 찾는다.
+_CT_RE = re.compile(rb"(?m)^content-type\s*:\s*([^\r\n;]+)", re.IGNORECASE)
+_BOUNDARY_RE = re.compile(rb'boundary\s*=\s*(?:"([^"]+)"|([^\s;]+))', re.IGNORECASE)
+_CTE_RE = re.compile(
+    rb"(?m)^content-transfer-encoding\s*:\s*([^\r\n;]+)", re.IGNORECASE
+)
+_CD_RE = re.compile(rb"(?m)^content-disposition\s*:\s*([^\r\n;]+)", re.IGNORECASE)
+_CHARSET_RE = re.compile(rb'charset\s*=\s*"?([\w.-]+)"?', re.IGNORECASE)
 
-def extract_text_from_body(filepath):
+# 비정상 메일의 재귀 멀티파트 폭주 방지
+_MAX_MIME_DEPTH = 10
+
+
+def _split_header_body(data):
+    """(헤더 블록, 본문) 튜플을 반환한다. 빈 줄이 없으면 본문은 b''."""
+    end = _find_header_end(data)
+    if end < 0:
+        return data, b""
+    sep_len = 4 if data[end : end + 4] == b"\r\n\r\n" else 2
+    return data[:end], data[end + sep_len :]
+
+
+def _decode_part(body, cte, charset):
+    cte = cte.strip().lower()
+    if cte == b"base64":
+        try:
+            body = base64.b64decode(body, validate=False)
+        except Exception:
+            return None
+    elif cte == b"quoted-printable":
+        body = quopri.decodestring(body)
     try:
-        with open(filepath, "rb") as f:
-            msg = BytesParser(policy=policy.default).parse(f)
-        body_parts = []
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
 
-        for part in msg.walk():
-            content_type = part.get_content_type()
-            content_disposition = part.get_content_disposition()
 
-            if content_disposition in ("attachment", "inline"):
-                continue  # 첨부파일은 제외
+def _iter_text_segments(header_bytes, body, depth=0):
+    m = _CT_RE.search(header_bytes)
+    ctype = m.group(1).strip().lower() if m else b"text/plain"
 
-            if content_type in ("text/plain", "text/html"):
-                try:
-                    body = part.get_content()
-                    if body:
-                        body_parts.append(str(body))
-                except Exception as e:
-                    print(f"본문 파싱 오류 ({filepath}): {e}")
+    if ctype.startswith(b"multipart/"):
+        if depth >= _MAX_MIME_DEPTH:
+            return
+        bm = _BOUNDARY_RE.search(header_bytes)
+        if not bm:
+            return
+        delimiter = b"--" + (bm.group(1) or bm.group(2))
+        segments = body.split(delimiter)
+        # segments[0]은 preamble, 종료 구분자('--') 이후는 epilogue
+        for segment in segments[1:]:
+            if segment[:2] == b"--":
+                break
+            part_header, part_body = _split_header_body(segment.lstrip(b"\r\n"))
+            yield from _iter_text_segments(part_header, part_body, depth + 1)
+        return
 
-        return "\n".join(body_parts)
+    # 말단 파트: 첨부파일은 디코딩하지 않는다
+    cd = _CD_RE.search(header_bytes)
+    if cd and cd.group(1).strip().lower() in (b"attachment", b"inline"):
+        return
+    if ctype in (b"text/plain", b"text/html"):
+        cte_m = _CTE_RE.search(header_bytes)
+        charset_m = _CHARSET_RE.search(header_bytes)
+        text = _decode_part(
+            body,
+            cte_m.group(1) if cte_m else b"",
+            charset_m.group(1).decode("ascii", "ignore") if charset_m else "utf-8",
+        )
+        if text:
+            yield text
 
-    except Exception as e:
-        print(f"이메일 파싱 실패: {filepath}: {e}")
-        return ""
 
+def iter_body_texts(filepath):
+    """본문의 text 파트를 한 번에 하나씩 디코딩하여 생성한다.
 
-def extract_text_from_header(filepath):
+    email 파서로 파트마다 Message 객체를 만드는 대신 boundary 기준으로
+    원시 바이트를 직접 잘라, text 파트의 본문만 필요할 때 디코딩한다.
+    모든 파트를 합친 문자열을 만들지 않으므로 피크 메모리가 가장 큰
+    단일 파트 크기 수준으로 유지되고, 첨부파일은 전혀 디코딩하지 않는다.
+    """
     try:
         with open(filepath, "rb") as f:
-            header_lines = []
-            for line in f:
-                if line in (b"\n", b"\r\n"):
+            data = f.read()
+    except OSError as e:
+        print(f"이메일 파싱 실패: {filepath}: {e}")
+        return
+    header_bytes, body = _split_header_body(data)
+    yield from _iter_text_segments(header_bytes, body)
+
+
+# 헤더 추출용 읽기 단위
+_HEADER_CHUNK = 65536
+
+
+def _find_header_end(data, start=0):
+    # CRLF/LF 빈 줄 중 앞선 쪽 위치, 없으면 -1
+    i = data.find(b"\r\n\r\n", start)
+    j = data.find(b"\n\n", start)
+    if i < 0:
+        return j
+    if j < 0:
+        return i
+    return min(i, j)
+
+
+def extract_header_bytes(filepath):
+    # 버퍼드 IO 래퍼를 거치지 않고 os.open/os.read로 직접 읽는다.
+    # 파일당 시스템 콜이 open-read-close 세 번으로 줄어, 작은 EML이
+    # 수백만 개인 코퍼스에서 시스템 콜 비용이 눈에 띄게 준다.
+    try:
+        # Windows에서는 O_BINARY가 없으면 텍스트 모드로 열린다 (CRLF 변환)
+        fd = os.open(filepath, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            data = os.read(fd, _HEADER_CHUNK)
+            end = _find_header_end(data)
+            while end < 0:
+                chunk = os.read(fd, _HEADER_CHUNK)
+                if not chunk:
                     break
-                header_lines.append(line)
-            header_content = b"".join(header_lines).decode(errors="ignore")
-            return header_content
+                search_from = max(0, len(data) - 3)
+                data += chunk
+                end = _find_header_end(data, search_from)
+            return data if end < 0 else data[:end]
+        finally:
+            os.close(fd)
     except Exception as e:
         print(f"헤더 읽기 실패: {filepath}: {e}")
-        return ""
+        return b""
 
 
-def find_matches(filepath, pattern, search_body=False):
+def find_matches(filepath, pattern, search_body=False, first_only=False):
     if search_body:
-        content = extract_text_from_body(filepath)
-    else:
-        content = extract_text_from_header(filepath)
+        matches = []
+        for text in iter_body_texts(filepath):
+            found = pattern.findall(text)
+            if found:
+                matches.extend(found)
+                if first_only:
+                    # 파일 목록만 필요할 때는 첫 매칭에서 중단하여
+                    # 나머지 파트의 디코딩을 건너뛴다
+                    break
+        return matches
 
+    header_bytes = extract_header_bytes(filepath)
+    if isinstance(pattern.pattern, bytes):
+        # 바이트 패턴이면 디코딩 없이 원시 헤더에 바로 매칭
+        content = header_bytes
+    else:
+        content = header_bytes.decode(errors="ignore")
+    if first_only:
+        # 파일 목록만 필요하면 전체 매칭을 모으지 않고 첫 히트에서 끝낸다
+        m = pattern.search(content)
+        return [m.group(0)] if m else []
     return pattern.findall(content)
 
 
+def _iter_stdin_paths():
+    # find 등과 파이프로 연결해 한 프로세스에서 일괄 검색할 때 사용
+    for line in sys.stdin:
+        path = line.rstrip("\n")
+        if path:
+            yield path
+
+
+def _iter_eml_find(root):
+    """find(1)에 열거를 맡기고 null 구분 경로를 스트리밍한다.
+
+    거대한 트리에서는 readdir 결과를 파이썬 객체로 감싸는 비용이
+    커지므로, 열거를 C 프로세스 하나에 떠넘기고 처리와 겹친다.
+    find를 실행할 수 없으면 None을 반환한다(호출 측에서 내장 탐색 사용).
+    """
+    try:
+        proc = subprocess.Popen(
+            ["find", root, "-type", "f", "-iname", "*.eml", "-print0"],
+            stdout=subprocess.PIPE,
+        )
+    except OSError:
+        return None
+
+    out = proc.stdout
+    if out is None:  # stdout=PIPE이므로 실제로는 항상 존재
+        return None
+
+    def _stream():
+        leftover = b""
+        try:
+            while True:
+                chunk = out.read(1 << 20)
+                if not chunk:
+                    break
+                parts = (leftover + chunk).split(b"\0")
+                leftover = parts.pop()
+                for p in parts:
+                    yield os.fsdecode(p)
+            if leftover:
+                yield os.fsdecode(leftover)
+        finally:
+            out.close()
+            proc.wait()
+
+    return _stream()
+
+
+def _fast_copy(src, dst):
+    """매칭된 파일을 복사한다. 가능하면 커널 내 복사를 쓴다.
+
+    리눅스의 os.copy_file_range는 유저 공간을 거치지 않고 복사하며
+    (지원 파일시스템에서는 reflink), 미지원 플랫폼이나 파일시스템
+    경계를 넘는 경우에는 shutil.copy2로 대체한다.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as s, open(dst, "wb") as d:
+                while os.copy_file_range(s.fileno(), d.fileno(), 1 << 30):
+                    pass
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _iter_eml(root):
+    """os.scandir 기반 제너레이터로 .eml 파일을 스트리밍 탐색한다."""
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _iter_eml(entry.path)
+                elif entry.name.lower().endswith(".eml") and entry.is_file():
+                    yield entry.path
+    except OSError as e:
+        # 권한 없음 등으로 읽을 수 없는 디렉토리는 건너뛴다
+        print(f"디렉토리 탐색 실패: {root}: {e}", file=sys.stderr)
+
+
+def _search_file(filepath, pattern, search_body, first_only=False):
+    """워커 프로세스에서 실행: 파일 하나를 검색하여 (경로, 매칭 목록)을 반환."""
+    try:
+        return filepath, find_matches(filepath, pattern, search_body, first_only)
+    except Exception as e:
+        print(f"처리 실패: {filepath}: {e}")
+        return filepath, []
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="EML 파일 헤더 또는 본문을 검색하여 정규식에 매칭되는 파일 경로 또는 매칭 텍스트를 출력합니다."
     )
-    parser.add_argument("-i", "--input", required=True, help="입력 디렉토리 경로")
-    parser.add_argument("-p", "--pattern", required=True, help="찾을 정규 표현식")
+    parser.add_argument(
+        "-i",
+        "--input",
+        required=True,
+        help="입력 디렉토리 경로 ('-'이면 표준 입력에서 경로 목록을 읽음)",
+    )
+    parser.add_argument(
+        "-p",
+        "--pattern",
+        required=True,
+        action="append",
+        help="찾을 정규 표현식 (여러 번 지정하면 한 번의 스캔으로 함께 검색)",
+    )
     parser.add_argument(
         "--ignore-case", action="store_true", help="대소문자 구분 없이 검색"
     )
@@ -78,10 +288,20 @@ def main():
     parser.add_argument(
         "--match-only", action="store_true", help="매칭된 텍스트만 출력"
     )
+    parser.add_argument(
+        "--use-find",
+        action="store_true",
+        help="파일 열거를 find(1)에 맡깁니다 (거대한 트리에서 더 빠름)",
+    )
     args = parser.parse_args()
 
     input_dir = args.input
-    regex_pattern = args.pattern
+    # 패턴이 여러 개면 비캡처 그룹 alternation으로 묶어 한 번만 컴파일한다.
+    # 파일마다 패턴 수만큼 다시 스캔하는 대신 단일 패스로 검색된다.
+    if len(args.pattern) == 1:
+        regex_pattern = args.pattern[0]
+    else:
+        regex_pattern = "|".join(f"(?:{p})" for p in args.pattern)
     ignore_case = args.ignore_case
     output_dir = args.output
     search_body = args.body
@@ -90,7 +310,15 @@ def main():
     flags = re.IGNORECASE if ignore_case else 0
 
     try:
-        pattern = re.compile(regex_pattern, flags=flags)
+        if search_body:
+            pattern = re.compile(regex_pattern, flags=flags)
+        else:
+            # ASCII 패턴은 바이트로 컴파일해 헤더 디코딩(UTF-8 검증)을 생략.
+            # 한글 등 비ASCII 패턴은 기존대로 문자열 매칭으로 처리한다.
+            try:
+                pattern = re.compile(regex_pattern.encode("ascii"), flags=flags)
+            except UnicodeEncodeError:
+                pattern = re.compile(regex_pattern, flags=flags)
     except re.error as e:
         print(f"Invalid regular expression: {e}")
         return
@@ -98,27 +326,49 @@ def main():
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
 
-    for root, _, files in os.walk(input_dir):
-        for file in files:
-            if file.lower().endswith(".eml"):
-                filepath = os.path.join(root, file)
-                try:
-                    matches = find_matches(filepath, pattern, search_body)
-                    if matches:
-                        if match_only:
-                            for match in matches:
-                                print(match)
-                        else:
-                            if output_dir:
-                                dest_path = os.path.join(
-                                    output_dir, os.path.basename(filepath)
-                                )
-                                shutil.copy2(filepath, dest_path)
-                                print(f"복사 완료: {filepath} -> {dest_path}")
-                            else:
-                                print(filepath)
-                except Exception as e:
-                    print(f"처리 실패: {filepath}: {e}")
+    if input_dir != "-" and not os.path.isdir(input_dir):
+        sys.exit("유효한 EML 파일 또는 디렉토리가 아닙니다.")
+
+    paths = None
+    if input_dir == "-":
+        # 표준 입력의 경로 목록을 일괄 처리하여 프로세스 기동 비용을 1회로 줄인다
+        paths = _iter_stdin_paths()
+    elif args.use_find:
+        paths = _iter_eml_find(input_dir)
+        if paths is None:
+            print("find 명령을 실행할 수 없어 내장 탐색을 사용합니다.")
+    if paths is None:
+        paths = _iter_eml(input_dir)
+
+    # 검색(파싱+정규식)은 프로세스 풀에서, 출력/복사는 부모 프로세스에서 수행
+    worker = partial(
+        _search_file,
+        pattern=pattern,
+        search_body=search_body,
+        first_only=not match_only,
+    )
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for filepath, matches in executor.map(worker, paths, chunksize=64):
+            if not matches:
+                continue
+            if match_only:
+                for match in matches:
+                    # 캡처 그룹이 2개 이상이면 findall이 튜플을 주므로
+                    # 원소별로 디코딩해 바이트 패턴에서도 동일하게 출력한다
+                    if isinstance(match, tuple):
+                        match = tuple(
+                            g.decode(errors="ignore") if isinstance(g, bytes) else g
+                            for g in match
+                        )
+                    elif isinstance(match, bytes):
+                        match = match.decode(errors="ignore")
+                    print(match)
+            elif output_dir:
+                dest_path = os.path.join(output_dir, os.path.basename(filepath))
+                _fast_copy(filepath, dest_path)
+                print(f"복사 완료: {filepath} -> {dest_path}")
+            else:
+                print(filepath)
 
 
 if __name__ == "__main__":